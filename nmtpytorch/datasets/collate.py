@@ -14,8 +14,15 @@ class Batch(dict):
             "Incompatible batch dimension (1) between modalities."
         self.size = dim1s.pop()
 
-    def device(self, device):
-        self.update({k: v.to(device) for k, v in self.items()})
+    def device(self, device, non_blocking=False):
+        self.update({
+            k: v.to(device, non_blocking=non_blocking) for k, v in self.items()})
+
+    def pin_memory(self):
+        """Copies the tensors into page-locked memory so that host to GPU
+        transfers can be done asynchronously with ``non_blocking=True``."""
+        self.update({k: v.pin_memory() for k, v in self.items()})
+        return self
 
     def __repr__(self):
         s = "Batch(size={})\n".format(self.size)
@@ -1,9 +1,11 @@
 # -*- coding: utf-8 -*-
+import math
 from functools import lru_cache
 from pathlib import Path
 
 from PIL import Image
 
+import numpy as np
 import torch
 from torch.utils import data
 from torchvision import transforms
@@ -17,6 +19,16 @@ class ImageFolderDataset(data.Dataset):
     This class also makes use of ``lru_cache`` to cache an image file once
     opened to avoid repetitive disk access.
 
+    Images are returned as ``uint8`` tensors of shape ``(3, H, W)``, i.e.
+    4 times smaller than float tensors to cache and to transfer to the
+    device. Conversion to float and normalization are done on the device by
+    the ``ImageNormalization`` layer of ``ImageEncoder``.
+
+    If ``resize`` is given, JPEG files are decoded directly at the smallest
+    1/2, 1/4 or 1/8 scale that is still larger than the requested size,
+    which is much faster than decoding the full image to downscale it
+    afterwards.
+
     Arguments:
         root (str): The root folder that contains the images and index.txt
         resize (int, optional): An optional integer to be given to
@@ -33,6 +45,7 @@ class ImageFolderDataset(data.Dataset):
                  replicate=1, warmup=False, **kwargs):
         self.root = Path(root).expanduser().resolve()
         self.replicate = replicate
+        self.resize = resize
 
         # Image list in dataset order
         self.index = self.root / 'index.txt'
@@ -42,10 +55,7 @@ class ImageFolderDataset(data.Dataset):
             _transforms.append(transforms.Resize(resize))
         if crop is not None:
             _transforms.append(transforms.CenterCrop(crop))
-        _transforms.append(transforms.ToTensor())
-        _transforms.append(
-            transforms.Normalize(mean=[0.485, 0.456, 0.406],
-                                 std=[0.229, 0.224, 0.225]))
+        _transforms.append(transforms.Lambda(self._to_uint8_tensor))
         self.transform = transforms.Compose(_transforms)
 
         if not self.index.exists():
@@ -69,10 +79,28 @@ class ImageFolderDataset(data.Dataset):
         # Replicate the list if requested
         self.image_files = self.image_files * self.replicate
 
+    @staticmethod
+    def _to_uint8_tensor(img):
+        # HxWxC uint8 array to CxHxW tensor
+        return torch.from_numpy(
+            np.array(img, dtype=np.uint8)).permute(2, 0, 1).contiguous()
+
+    def _get_draft_size(self, size):
+        """Returns the minimal (width, height) to decode for resizing."""
+        if isinstance(self.resize, int):
+            # Shorter edge will be matched to self.resize
+            scale = self.resize / min(size)
+            return tuple(math.ceil(x * scale) for x in size)
+        # (h, w) is given
+        return tuple(reversed(self.resize))
+
     def _read_image(self, fname):
         with open(fname, 'rb') as f:
-            img = Image.open(f).convert('RGB')
-            return self.transform(img)
+            img = Image.open(f)
+            if self.resize is not None:
+                # Only has an effect on JPEG files
+                img.draft('RGB', self._get_draft_size(img.size))
+            return self.transform(img.convert('RGB'))
 
     @staticmethod
     def to_torch(batch):
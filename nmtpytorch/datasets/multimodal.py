@@ -6,6 +6,7 @@ from torch.utils.data.sampler import BatchSampler, SequentialSampler, RandomSamp
 from . import get_dataset
 from .collate import get_collate
 from ..samplers import BucketBatchSampler, ApproximateBucketBatchSampler
+from ..samplers import SortedBatchSampler
 
 logger = logging.getLogger('nmtpytorch')
 
@@ -15,7 +16,9 @@ class MultimodalDataset(Dataset):
 
     Arguments:
         data(dict): [data] section's relevant split dictionary
-        mode(str): One of train/eval/beam.
+        mode(str): One of train/eval/beam. Target data sources are neither
+            read nor required in the split configuration for 'beam', i.e.
+            inference only needs the source files.
         batch_size(int): Batch size.
         vocabs(dict): dictionary mapping keys to Vocabulary() objects
         topology(Topology): A topology object.
@@ -82,6 +85,10 @@ class MultimodalDataset(Dataset):
         # Set list of available datasets
         self.keys = list(self.datasets.keys())
 
+        # Fixed (key, dataset) pairs to avoid hashing DataSource keys,
+        # which are UserString objects, for every sample
+        self._items = tuple(self.datasets.items())
+
         # Get collator
         self.collate_fn = get_collate(self.keys)
 
@@ -102,23 +109,41 @@ class MultimodalDataset(Dataset):
             if self.bucket_by:
                 self.bucket_by = None
                 logger.info('Disabling bucketing for data loader.')
-            # No modality provided to bucket sequential batches
-            # Used for beam-search in image->text tasks
-            if self.mode == 'beam':
-                sampler = SequentialSampler(self)
-                self.sampler_type = 'sequential'
+            sort_key = self._get_sort_key() if self.mode == 'beam' else None
+            if sort_key is not None:
+                # Group similar-length sources to reduce padding during
+                # beam-search. The original order is recovered afterwards.
+                self.sort_lens = self.datasets[sort_key].lengths
+                self.sampler = SortedBatchSampler(
+                    batch_size=self.batch_size, sort_lens=self.sort_lens,
+                    store_indices=True)
+                self.sampler_type = 'sorted({})'.format(sort_key)
             else:
-                sampler = RandomSampler(self)
-                self.sampler_type = 'random'
-            self.sampler = BatchSampler(
-                sampler, batch_size=self.batch_size, drop_last=False)
+                # No modality provided to bucket sequential batches
+                # Used for beam-search in image->text tasks
+                if self.mode == 'beam':
+                    sampler = SequentialSampler(self)
+                    self.sampler_type = 'sequential'
+                else:
+                    sampler = RandomSampler(self)
+                    self.sampler_type = 'random'
+                self.sampler = BatchSampler(
+                    sampler, batch_size=self.batch_size, drop_last=False)
 
         # Set some metadata
         self.n_sources = len([k for k in self.keys if k.src])
         self.n_targets = len([k for k in self.keys if k.trg])
 
+    def _get_sort_key(self):
+        """Returns the first source modality with length information."""
+        for key, dataset in self.datasets.items():
+            lengths = getattr(dataset, 'lengths', None)
+            if key.src and lengths and len(lengths) == len(dataset):
+                return key
+        return None
+
     def __getitem__(self, idx):
-        return {k: self.datasets[k][idx] for k in self.keys}
+        return {k: ds[idx] for k, ds in self._items}
 
     def __len__(self):
         return self.size
@@ -3,6 +3,7 @@ from functools import lru_cache
 import numpy as np
 import torch
 from torch.utils.data import Dataset
+from torch.nn.utils.rnn import pad_sequence
 from ..utils.misc import pbar
 
 
@@ -69,15 +70,12 @@ class NumpySequenceDataset(Dataset):
     @staticmethod
     def to_torch(batch):
         # List of (t, feat_dim)
-        max_len = max(x.shape[0] for x in batch)
-        width = batch[0].shape[1]
-        padded = [np.zeros((max_len, width)) for _ in batch]
-        for pad, x in zip(padded, batch):
-            pad[:x.shape[0]] = x
+        padded = pad_sequence(
+            [torch.from_numpy(np.asarray(x, dtype='float32')) for x in batch],
+            batch_first=True)
         # padded is (n_samples, t, feat_dim)
         # return (n, f, t) for compatibility with the other input sources
-        return torch.from_numpy(
-            np.array(padded, dtype='float32')).transpose(1, 2)
+        return padded.transpose(1, 2)
 
     def __len__(self):
         return self.size
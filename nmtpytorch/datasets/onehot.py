@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
+from itertools import chain
 from pathlib import Path
 
+import numpy as np
 import torch
 from torch.utils.data import Dataset
 
@@ -30,24 +32,28 @@ class OneHotDataset(Dataset):
             raise RuntimeError("Multiple source files not supported.")
 
         # Read the sentences and map them to vocabulary
-        self.data, self.lengths = read_sentences(
+        data, self.lengths = read_sentences(
             self.fnames[0], self.vocab, eos=False, bos=False)
 
-        # Convert indices to torch tensors
-        self.data = [torch.LongTensor(elem) for elem in self.data]
+        # Keep all indices in a single flat array instead of
+        # one tensor per sentence, sentence i is tokens[offsets[i]:offsets[i+1]]
+        self.offsets = np.cumsum([0] + self.lengths)
+        self.tokens = np.fromiter(
+            chain.from_iterable(data), dtype=np.int64, count=self.offsets[-1])
 
         # number of possible classes is the vocab size
         self.n_classes = len(self.vocab)
 
         # Dataset size
-        self.size = len(self.data)
+        self.size = len(self.lengths)
 
     @staticmethod
     def to_torch(batch, **kwargs):
         return onehot_data(batch, **kwargs)
 
     def __getitem__(self, idx):
-        return self.data[idx]
+        return torch.from_numpy(
+            self.tokens[self.offsets[idx]:self.offsets[idx + 1]])
 
     def __len__(self):
         return self.size
@@ -1,7 +1,8 @@
 # Basic layers
-from .ff import FF
+from .ff import FF, QuantizedFF
 from .fusion import Fusion
 from .flatten import Flatten
+from .image_normalization import ImageNormalization
 from .seq_conv import SequenceConvolution
 from .rnninit import RNNInitializer
 from .max_margin import MaxMargin
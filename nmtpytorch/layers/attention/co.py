@@ -40,7 +40,7 @@ class CoAttention(nn.Module):
 
         catted = torch.cat([b_ctx_1, b_ctx_2], dim=1)
         hidden = self.activ(self.mlp_hid(catted))
-        affinity_matrix = self.mlp_out(hidden).squeeze(1)
+        affinity_matrix = self.mlp_out(hidden).squeeze(1).float()
         if ctx_1_mask is not None:
             ctx_1_neg_mask = (1. - ctx_1_mask.transpose(0, 1).unsqueeze(2)) * -1e12
             affinity_matrix += ctx_1_neg_mask
@@ -75,6 +75,7 @@ class DotAttention(nn.Module):
             self.temperature).squeeze(1).t()
 
         # Normalize attention scores correctly -> S*B
+        scores = scores.float()
         if ctx_mask is not None:
             # Mask out padded positions with -inf so that they get 0 attention
             scores.masked_fill_((1 - ctx_mask).byte(), -1e8)
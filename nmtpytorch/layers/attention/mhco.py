@@ -57,7 +57,7 @@ class MultiHeadCoAttention(nn.Module):
         key_2_up = shape(self.linear_keys_2(ctx_2), ctx_2_len)
         value_2_up = shape(self.linear_values_2(ctx_2), ctx_2_len)
 
-        scores = torch.matmul(key_2_up, key_1_up.transpose(2, 3))
+        scores = torch.matmul(key_2_up, key_1_up.transpose(2, 3)).float()
 
         if ctx_1_mask is not None:
             mask = ctx_1_mask.t().unsqueeze(2).unsqueeze(3).expand_as(scores)
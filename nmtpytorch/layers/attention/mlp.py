@@ -55,6 +55,7 @@ class MLPAttention(DotAttention):
             self.activ(inner_sum)).div(self.temperature).squeeze(-1)
 
         # Normalize attention scores correctly -> S*B
+        scores = scores.float()
         if ctx_mask is not None:
             # Mask out padded positions with -inf so that they get 0 attention
             scores.masked_fill_((1 - ctx_mask).byte(), -1e8)
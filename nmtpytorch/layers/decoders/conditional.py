@@ -238,6 +238,12 @@ class ConditionalDecoder(nn.Module):
             self.v_emb = self.ff_feats(ctx_dict['feats'][0]).squeeze(0)
         return self._init_func(ctx_dict)
 
+    def f_keep(self, idxs):
+        """Keeps the per-sentence state of the sentences given by `idxs`
+        when beam search drops the finished ones from the batch."""
+        if self.emb_interact:
+            self.v_emb = self.v_emb[idxs]
+
     def f_next(self, ctx_dict, y, h):
         """Applies one timestep of recurrence."""
         # Get hidden states from the first decoder (purely cond. on LM)
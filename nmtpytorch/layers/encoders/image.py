@@ -7,6 +7,7 @@ from torchvision.models.vgg import cfgs as vgg_cfg
 
 from ...utils.misc import get_n_params
 from ..flatten import Flatten
+from ..image_normalization import ImageNormalization
 
 
 def get_vgg_names(config, batch_norm=False):
@@ -91,9 +92,11 @@ class ImageEncoder:
     def setup(self, layer, dropout=0., pool=None):
         """Truncates the requested CNN until `layer`, `layer` included. The
         final instance is stored under `self.cnn` and can be obtained with
-        the `.get()` method. The instance will have `requires_grad=False`
-        for all parameters by default. You can use `set_requires_grad()`
-        to selectively or completely enable `requires_grad` at layer-level.
+        the `.get()` method. The CNN is preceded by an `ImageNormalization`
+        layer which accepts raw `uint8` images. The instance will have
+        `requires_grad=False` for all parameters by default. You can use
+        `set_requires_grad()` to selectively or completely enable
+        `requires_grad` at layer-level.
 
         If layer == 'penultimate' and CNN type is VGG, whole CNN except
         the last classification layer will be returned. In this case,
@@ -111,6 +114,9 @@ class ImageEncoder:
         layers = OrderedDict()
         self.layer_map = self.CFG_MAP[self.cnn_type]
 
+        # ImageFolderDataset returns uint8 images, normalize them on device
+        layers['normalize'] = ImageNormalization()
+
         if self.cnn_type.startswith('vgg'):
             assert len(self._base_cnn.features) == len(self.layer_map)
 
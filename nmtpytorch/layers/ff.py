@@ -61,3 +61,43 @@ class FF(nn.Module):
         if self.use_bias:
             repr_ += ', bias_zero=' + str(self.bias_zero)
         return repr_ + ')'
+
+
+class QuantizedFF(nn.Module):
+    """Dynamically quantized counterpart of `FF` for int8 CPU inference.
+    Instances are created through `from_float()` by
+    `quantize_dynamic()` when `FF` is mapped to it.
+
+    Arguments:
+        linear(nn.quantized.dynamic.Linear): The quantized projection.
+        activ(str, optional): The non-linearity of the original `FF` layer.
+    """
+
+    def __init__(self, linear, activ=None):
+        super().__init__()
+        self.linear = linear
+        self.activ_type = activ
+        self.activ = get_activation_fn(activ)
+
+    def forward(self, input):
+        return self.activ(self.linear(input))
+
+    @classmethod
+    def from_float(cls, mod, **kwargs):
+        try:
+            from torch.ao.nn.quantized.dynamic import Linear as QLinear
+        except ImportError:
+            from torch.nn.quantized.dynamic import Linear as QLinear
+
+        # Wrap the float weights in a plain Linear that QLinear can convert
+        linear = nn.Linear(mod.in_features, mod.out_features, bias=mod.use_bias)
+        linear.weight = mod.weight
+        linear.bias = mod.bias
+        linear.qconfig = mod.qconfig
+        return cls(QLinear.from_float(linear, **kwargs), mod.activ_type)
+
+    def __repr__(self):
+        return self.__class__.__name__ + '(' \
+            + 'in_features=' + str(self.linear.in_features) \
+            + ', out_features=' + str(self.linear.out_features) \
+            + ', activ=' + str(self.activ_type) + ')'
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+import torch
+
+
+class ImageNormalization(torch.nn.Module):
+    """Converts a batch of ``uint8`` images to float and normalizes them
+    with ImageNet statistics. Done on the model's device to avoid transferring
+    float images from the host. Float inputs are returned untouched.
+    """
+    def __init__(self, mean=(0.485, 0.456, 0.406), std=(0.229, 0.224, 0.225)):
+        super().__init__()
+        self.mean = mean
+        self.std = std
+        # (mean, std) tensors per device, not saved into the state_dict
+        self._stats = {}
+
+    def _get_stats(self, device):
+        if device not in self._stats:
+            self._stats[device] = tuple(
+                torch.tensor(x, dtype=torch.float, device=device).view(1, -1, 1, 1)
+                for x in (self.mean, self.std))
+        return self._stats[device]
+
+    def forward(self, x):
+        if x.dtype != torch.uint8:
+            return x
+        mean, std = self._get_stats(x.device)
+        return x.float().div_(255).sub_(mean).div_(std)
+
+    def __repr__(self):
+        return "ImageNormalization(mean={}, std={})".format(self.mean, self.std)
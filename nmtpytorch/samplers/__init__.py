@@ -1,3 +1,4 @@
 # -*- coding: utf-8 -*-
 from .bucket import BucketBatchSampler
 from .approx import ApproximateBucketBatchSampler
+from .sorted import SortedBatchSampler
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+import math
+
+import numpy as np
+
+from torch.utils.data.sampler import Sampler
+
+
+class SortedBatchSampler(Sampler):
+    r"""Samples consecutive batches of indices from the length-sorted
+    dataset. Unlike `BucketBatchSampler`, batches are always full (except
+    the last one) and contain sequences of similar, not necessarily equal
+    lengths. This is mostly useful for inference where the order of
+    samples does not matter as long as it can be recovered afterwards.
+
+    Arguments:
+        batch_size (int): Size of mini-batch.
+        sort_lens (list): List of source or target lengths corresponding to each
+            item in the dataset.
+        store_indices (bool, optional): If ``True``, indices that will unsort
+            the dataset will be stored. This used by beam search/inference.
+        order (str, optional): ``descending`` (default) or ``ascending``.
+    """
+
+    def __init__(self, batch_size, sort_lens, store_indices=False,
+                 order='descending'):
+        assert order in ('ascending', 'descending'), \
+            "order should be 'ascending' or 'descending'"
+
+        self.batch_size = batch_size
+        self.store_indices = store_indices
+        self.order = order
+
+        sort_lens = np.array(sort_lens)
+        if self.order == 'descending':
+            sort_lens = -sort_lens
+
+        # Stable sort keeps the corpus order between same-length samples
+        self.sorted_idxs = np.argsort(sort_lens, kind='mergesort')
+
+        # Set number of batches
+        self.n_batches = math.ceil(len(self.sorted_idxs) / self.batch_size)
+
+    def __iter__(self):
+        self.orig_idxs = []
+
+        for start in range(0, len(self.sorted_idxs), self.batch_size):
+            sidxs = self.sorted_idxs[start: start + self.batch_size]
+
+            if self.store_indices:
+                self.orig_idxs.extend(sidxs)
+
+            yield sidxs
+
+    def __len__(self):
+        """Returns how many batches are inside."""
+        return self.n_batches
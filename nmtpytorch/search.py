@@ -2,6 +2,7 @@
 import torch
 
 from .utils.misc import pbar
+from .utils.data import prefetch_batches
 from .utils.topology import Topology
 from .utils.device import DEVICE
 
@@ -21,8 +22,33 @@ def check_context_ndims(ctx_dict):
             "{} is not 3D. 1st dim should always be a time dimension.".format(name)
 
 
+def backtrack(tokens, ptrs):
+    """Reconstructs the hypotheses from the tokens selected at each step
+    and the back-pointers to their previous beam positions.
+
+    Arguments:
+        tokens (Tensor): max_len x batch_size x beam_size tensor of tokens.
+        ptrs (Tensor): max_len x batch_size x beam_size tensor of beam
+            positions at the previous step.
+
+    Returns:
+        Tensor:
+            max_len x batch_size x beam_size tensor of hypotheses ordered
+            w.r.t their final beam position.
+    """
+    hyps = torch.zeros_like(tokens)
+    # Start from the final beam positions
+    pos = torch.arange(tokens.size(2), device=tokens.device).repeat(
+        tokens.size(1), 1)
+    for tstep in range(tokens.size(0) - 1, -1, -1):
+        hyps[tstep] = tokens[tstep].gather(1, pos)
+        pos = ptrs[tstep].gather(1, pos)
+    return hyps
+
+
 def beam_search(models, data_loader, task_id=None, beam_size=12, max_len=200,
-                lp_alpha=0., suppress_unk=False, n_best=False):
+                lp_alpha=0., suppress_unk=False, n_best=False,
+                share_encoder=False):
     """An efficient implementation for beam-search algorithm.
 
     Arguments:
@@ -41,6 +67,9 @@ def beam_search(models, data_loader, task_id=None, beam_size=12, max_len=200,
             of <unk> token.
         n_best (bool, optional): If `True`, returns n-best list of the beam
             with the associated scores.
+        share_encoder (bool, optional): If `True`, the models are assumed
+            to have identical encoders and the sources are only encoded by
+            the first model. (Default: False)
 
     Returns:
         list:
@@ -81,32 +110,50 @@ def beam_search(models, data_loader, task_id=None, beam_size=12, max_len=200,
     n_vocab = len(vocab)
 
     # Tensorized beam that will shrink and grow up to max_batch_size
+    # Stores the selected tokens and their back-pointers at each step
     beam_storage = torch.zeros(
         max_len, max_batch_size, k, dtype=torch.long, device=DEVICE)
+    ptr_storage = torch.zeros(
+        max_len, max_batch_size, k, dtype=torch.long, device=DEVICE)
     mask = torch.arange(max_batch_size * k, device=DEVICE)
     nll_storage = torch.zeros(max_batch_size, device=DEVICE)
+    score_storage = torch.zeros(max_batch_size, k, device=DEVICE)
+    kdxs = torch.arange(k, device=DEVICE)
 
-    for batch in pbar(data_loader, unit='batch'):
-        batch.device(DEVICE)
-
+    # Next batch is copied to the device while decoding the current one
+    for batch in prefetch_batches(pbar(data_loader, unit='batch'), DEVICE):
         # Always use the initial storage
         beam = beam_storage.narrow(1, 0, batch.size).zero_()
 
-        # Mask to apply to pdxs.view(-1) to fix indices
-        nk_mask = mask.narrow(0, 0, batch.size * k)
+        # Identity pointers for the steps after a sentence is finished
+        ptrs = ptr_storage.narrow(1, 0, batch.size)
+        ptrs.copy_(kdxs.expand_as(ptrs))
 
         # nll: batch_size x 1 (will get expanded further)
         nll = nll_storage.narrow(0, 0, batch.size).unsqueeze(1)
 
+        # Final scores of the hypotheses: batch_size x beam_size
+        scores = score_storage.narrow(0, 0, batch.size)
+
+        # Sentences of the batch that are still being decoded
+        active = mask.narrow(0, 0, batch.size)
+
         # Tile indices to use in the loop to expand first dim
         tile = range(batch.size)
 
         # Encode source modalities
-        ctx_dicts = [encode(batch, **enc_args) for encode in encoders]
+        if share_encoder:
+            ctx_dicts = [encoders[0](batch, **enc_args)] * len(models)
+        else:
+            ctx_dicts = [encode(batch, **enc_args) for encode in encoders]
 
         # Sanity check one of the context dictionaries for dimensions
         check_context_ndims(ctx_dicts[0])
 
+        # All hyps of a sentence share the same source context, it is
+        # only re-tiled when the set of active sentences changes.
+        tiled_ctx_dicts = ctx_dicts
+
         # Get initial decoder state (N*H)
         h_ts = [f_init(ctx_dict) for f_init, ctx_dict in zip(f_inits, ctx_dicts)]
 
@@ -115,8 +162,45 @@ def beam_search(models, data_loader, task_id=None, beam_size=12, max_len=200,
         idxs = models[0].get_bos(batch.size).to(DEVICE)
 
         for tstep in range(max_len):
-            # Select correct positions from source context
-            ctx_dicts = [tile_ctx_dict(cd, tile) for cd in ctx_dicts]
+            # Context is tiled beam_size times after the first step
+            retile = tstep == 1
+
+            if tstep > 0:
+                # Detect sentences whose hyps have all generated <eos>
+                finished = idxs.view(-1, k).eq(eos).all(1)
+                if finished.all():
+                    break
+                if finished.any():
+                    # Store their final scores and drop them from the
+                    # decoder inputs, the remaining steps would only
+                    # generate <eos> for them.
+                    done = finished.nonzero().squeeze(-1)
+                    keep = finished.eq(0).nonzero().squeeze(-1)
+                    scores.index_copy_(0, active[done], nll[done])
+                    rows = (keep.unsqueeze(1) * k + kdxs).view(-1)
+                    active, nll = active[keep], nll[keep]
+                    idxs, tile = idxs[rows], tile[rows]
+                    retile = True
+                    # Decoders may also cache a state per sentence
+                    for dec in decs:
+                        if hasattr(dec, 'f_keep'):
+                            dec.f_keep(keep)
+
+            # Number of sentences that are still being decoded
+            n_active = active.numel()
+
+            # Mask to apply to pdxs.view(-1) to fix indices
+            nk_mask = mask.narrow(0, 0, n_active * k)
+
+            if retile:
+                # Map each hyp to the source context of its sentence
+                ctx_idxs = active.unsqueeze(1).repeat(1, k).view(-1)
+                if share_encoder:
+                    tiled_ctx_dicts = [
+                        tile_ctx_dict(ctx_dicts[0], ctx_idxs)] * len(models)
+                else:
+                    tiled_ctx_dicts = [
+                        tile_ctx_dict(cd, ctx_idxs) for cd in ctx_dicts]
 
             # Get log probabilities and next state
             # log_p: batch_size x vocab_size (t = 0)
@@ -124,10 +208,14 @@ def beam_search(models, data_loader, task_id=None, beam_size=12, max_len=200,
             # NOTE: get_emb does not exist in some models, fix this.
             log_ps, h_ts = zip(
                 *[f_next(cd, dec.get_emb(idxs, tstep), h_t[tile]) for
-                  f_next, dec, cd, h_t in zip(f_nexts, decs, ctx_dicts, h_ts)])
+                  f_next, dec, cd, h_t in zip(
+                      f_nexts, decs, tiled_ctx_dicts, h_ts)])
 
-            # Do the actual averaging of log-probabilities
-            log_p = sum(log_ps).data
+            # Do the actual averaging of log-probabilities in-place,
+            # no temporary tensor is created for single models.
+            log_p = log_ps[0].data
+            for log_p_ in log_ps[1:]:
+                log_p.add_(log_p_.data)
 
             if suppress_unk:
                 log_p[:, unk] = inf
@@ -135,8 +223,6 @@ def beam_search(models, data_loader, task_id=None, beam_size=12, max_len=200,
             # Detect <eos>'d hyps
             idxs = (idxs == 2).nonzero()
             if idxs.numel():
-                if idxs.numel() == batch.size * k:
-                    break
                 idxs.squeeze_(-1)
                 # Unfavor all candidates
                 log_p.index_fill_(0, idxs, inf)
@@ -148,22 +234,30 @@ def beam_search(models, data_loader, task_id=None, beam_size=12, max_len=200,
             #   nll: batch_size x beam_size (x 1)
             # nll becomes: batch_size x beam_size*vocab_size here
             # Reduce (N, K*V) to k-best
-            nll, beam[tstep] = nll.unsqueeze_(2).add(log_p.view(
-                batch.size, -1, n_vocab)).view(batch.size, -1).topk(
+            nll, topk_idxs = nll.unsqueeze_(2).add(log_p.view(
+                n_active, -1, n_vocab)).view(n_active, -1).topk(
                     k, sorted=False, largest=True)
 
             # previous indices into the beam and current token indices
-            pdxs = beam[tstep] / n_vocab
-            beam[tstep].remainder_(n_vocab)
-            idxs = beam[tstep].view(-1)
+            pdxs = topk_idxs // n_vocab
+            topk_idxs.remainder_(n_vocab)
+            idxs = topk_idxs.view(-1)
 
             # Compute correct previous indices
             # Mask is needed since we're in flattened regime
-            tile = pdxs.view(-1) + (nk_mask / k) * (k if tstep else 1)
+            tile = pdxs.view(-1) + (nk_mask // k) * (k if tstep else 1)
 
-            if tstep > 0:
-                # Permute all hypothesis history according to new order
-                beam[:tstep] = beam[:tstep].gather(2, pdxs.repeat(tstep, 1, 1))
+            # Only store the new tokens and where they come from, the
+            # hypotheses are reconstructed once decoding is over.
+            beam[tstep].index_copy_(0, active, topk_idxs)
+            ptrs[tstep].index_copy_(0, active, pdxs)
+
+        # Store the scores of the sentences decoded until the end
+        scores.index_copy_(0, active, nll)
+        nll = scores
+
+        # Follow the back-pointers to get the hypotheses
+        beam = backtrack(beam, ptrs)
 
         # Put an explicit <eos> to make idxs_to_sent happy
         beam[max_len - 1] = eos
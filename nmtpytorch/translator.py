@@ -5,14 +5,23 @@ import time
 import logging
 import pickle as pkl
 from pathlib import Path
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor
 
 import torch
 
+try:
+    # Older aliases outside of torch.ao are deprecated since torch 1.13
+    from torch.ao import quantization
+except ImportError:
+    from torch import quantization
+
 from .utils.misc import load_pt_file
 from .utils.filterchain import FilterChain
 from .utils.data import make_dataloader
 from .utils.topology import Topology
 from .utils.device import DEVICE
+from .layers import FF, QuantizedFF
 
 from . import models
 from .config import Options
@@ -25,6 +34,11 @@ class Translator:
     """A utility class to pack translation related features."""
 
     def __init__(self, **kwargs):
+        # Optional decoding features that other callers may not provide
+        self.fp16 = False
+        self.compile = False
+        self.int8 = False
+
         # Store attributes directly. See bin/nmtpy for their list.
         self.__dict__.update(kwargs)
 
@@ -40,6 +54,26 @@ class Translator:
         # Disable gradient tracking
         torch.set_grad_enabled(False)
 
+        # Page-locked batches and the other GPU-only options need CUDA
+        self.on_gpu = DEVICE is not None and DEVICE.type == 'cuda'
+
+        if self.on_gpu:
+            # Let cuDNN select the fastest convolution algorithms for the
+            # fixed-size inputs of CNN encoders
+            torch.backends.cudnn.benchmark = True
+            if hasattr(torch.backends.cuda, 'matmul'):
+                # Use TensorFloat-32 matmuls on Ampere and newer GPUs
+                torch.backends.cuda.matmul.allow_tf32 = True
+
+        if self.int8 and self.on_gpu:
+            logger.info('--int8 is only supported with -d cpu.')
+            sys.exit(1)
+
+        if self.int8 and not hasattr(
+                quantization, 'get_default_dynamic_quant_module_mappings'):
+            logger.info('--int8 requires torch>=1.7.')
+            sys.exit(1)
+
         # Create model instances and move them to device
         for model_file in self.models:
             data = load_pt_file(model_file)
@@ -58,6 +92,18 @@ class Translator:
             instance.setup(is_train=False)
             # Load weights
             instance.load_state_dict(weights, strict=False)
+            if self.int8:
+                # Use int8 weights for FF, linear and recurrent layers,
+                # activations are quantized on-the-fly
+                mapping = dict(
+                    quantization.get_default_dynamic_quant_module_mappings())
+                mapping[FF] = QuantizedFF
+                quantization.quantize_dynamic(
+                    instance, {FF, torch.nn.Linear, torch.nn.LSTM, torch.nn.GRU,
+                               torch.nn.LSTMCell, torch.nn.GRUCell},
+                    dtype=torch.qint8, mapping=mapping, inplace=True)
+                n_ff = sum(isinstance(m, QuantizedFF) for m in instance.modules())
+                logger.info('{} FF layers quantized to int8'.format(n_ff))
             # Move to device
             instance.to(DEVICE)
             # Switch to eval mode
@@ -70,6 +116,9 @@ class Translator:
         # Do some sanity-check
         self.sanity_check()
 
+        if self.compile:
+            self.compile_decoders()
+
         # Setup post-processing filters
         eval_filters = self.instances[0].opts.train['eval_filters']
 
@@ -99,6 +148,14 @@ class Translator:
             logger.info('You can only give one split name when -S is provided.')
             sys.exit(1)
 
+        if self.fp16 and not (self.on_gpu and hasattr(torch.cuda, 'amp')):
+            logger.info('--fp16 requires a GPU and torch>=1.6.')
+            sys.exit(1)
+
+        if self.compile and not hasattr(torch, 'compile'):
+            logger.info('--compile requires torch>=2.0.')
+            sys.exit(1)
+
         eval_filters = set([i.opts.train['eval_filters'] for i in self.instances])
         assert len(eval_filters) < 2, "eval_filters differ between instances."
 
@@ -112,6 +169,50 @@ class Translator:
             assert False not in incl, \
                 'Not all models are compatible with task "{}"!'.format(task.direction)
 
+        # Ensembles of models sharing the same encoder encode only once
+        self.share_encoder = len(self.instances) > 1 and all(
+            self._same_encoder(self.instances[0], i) for i in self.instances[1:])
+        if self.share_encoder:
+            logger.info('Models have identical encoders, will encode once.')
+
+    def _get_decoder(self, instance):
+        """Returns the decoder used by beam search for the given model."""
+        if self.task_id is None:
+            return instance.dec
+        return instance.get_decoder(Topology(self.task_id).first_trg)
+
+    def _get_encoder_state(self, instance):
+        """Returns the state_dict of a model without its decoder."""
+        dec = self._get_decoder(instance)
+        prefix = [name for name, module in instance.named_modules()
+                  if module is dec][0] + '.'
+        return {k: v for k, v in instance.state_dict().items()
+                if not k.startswith(prefix)}
+
+    def _same_encoder(self, inst_a, inst_b):
+        """Returns True if both models would produce the same encodings."""
+        if type(inst_a) != type(inst_b) or inst_a.opts.model != inst_b.opts.model:
+            return False
+        state_a = self._get_encoder_state(inst_a)
+        state_b = self._get_encoder_state(inst_b)
+        if state_a.keys() != state_b.keys():
+            return False
+        for key, value in state_a.items():
+            if not (torch.is_tensor(value) and
+                    value.shape == state_b[key].shape and
+                    torch.equal(value, state_b[key])):
+                return False
+        return True
+
+    def compile_decoders(self):
+        """Compiles the single-step decoding function used by beam search
+        to remove the Python overhead of the many small per-step kernels."""
+        for instance in self.instances:
+            dec = self._get_decoder(instance)
+            # Batch size changes between steps and batches
+            dec.f_next = torch.compile(dec.f_next, dynamic=True)
+        logger.info('Decoder steps will be compiled with torch.compile()')
+
     def translate(self, split):
         """Returns the hypotheses generated by translating the given split
         using the given model instance.
@@ -130,14 +231,25 @@ class Translator:
 
         # NOTE: Data iteration needs to be unique for ensembling
         # otherwise it gets too complicated
-        loader = make_dataloader(dataset)
+        loader = make_dataloader(dataset, pin_memory=self.on_gpu)
 
         logger.info('Starting translation')
         start = time.time()
-        hyps = beam_search(self.instances, loader, task_id=self.task_id,
-                           beam_size=self.beam_size, max_len=self.max_len,
-                           lp_alpha=self.lp_alpha, suppress_unk=self.suppress_unk,
-                           n_best=self.n_best)
+        with ExitStack() as stack:
+            if hasattr(torch, 'inference_mode'):
+                # Skips the autograd bookkeeping that no_grad() still does
+                stack.enter_context(torch.inference_mode())
+            if self.fp16:
+                # Weights stay in float32, matmuls and convs run in float16.
+                # Attention layers mask and normalize their scores in
+                # float32, their large negative mask values overflow float16.
+                stack.enter_context(torch.cuda.amp.autocast())
+            hyps = beam_search(self.instances, loader, task_id=self.task_id,
+                               beam_size=self.beam_size, max_len=self.max_len,
+                               lp_alpha=self.lp_alpha,
+                               suppress_unk=self.suppress_unk,
+                               n_best=self.n_best,
+                               share_encoder=self.share_encoder)
         up_time = time.time() - start
         logger.info('Took {:.3f} seconds, {} sent/sec'.format(
             up_time, math.floor(len(hyps) / up_time)))
@@ -165,24 +277,35 @@ class Translator:
             suffix += ".nbest"
         output = "{}.{}{}".format(self.output, split, suffix)
 
-        f = open(output, 'w')
         if self.n_best:
+            lines = []
             for idx, (cands, scores) in enumerate(hyps):
                 cands = self.filter(cands)
                 sorted_cs = sorted(
                     zip(cands, scores), key=lambda x: x[1], reverse=True)
                 for cand, score in sorted_cs:
                     # cands is a list of n sents, scores as well
-                    f.write('{} ||| {} ||| {:.5f}\n'.format(idx, cand, score))
+                    lines.append('{} ||| {} ||| {:.5f}'.format(idx, cand, score))
         else:
             # Post-process strings if requested
-            hyps = self.filter(hyps)
-            for line in hyps:
-                f.write(line + '\n')
-        f.close()
+            lines = self.filter(hyps)
+
+        # Write everything at once
+        with open(output, 'w') as f:
+            if lines:
+                f.write('\n'.join(lines) + '\n')
 
     def __call__(self):
         """Dumps the hypotheses for each of the requested split/file."""
-        for input_ in self.splits:
-            hyps = self.translate(input_)
-            self.dump(hyps, input_)
+        # Post-process and write the hypotheses of a split in the
+        # background while the next split is being translated
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            dump = None
+            for input_ in self.splits:
+                hyps = self.translate(input_)
+                if dump is not None:
+                    # Re-raise errors of the previous split before going on
+                    dump.result()
+                dump = executor.submit(self.dump, hyps, input_)
+            if dump is not None:
+                dump.result()
@@ -2,6 +2,7 @@
 import torch
 import logging
 from torch.utils.data import DataLoader
+from torch.nn.utils.rnn import pad_sequence
 import numpy as np
 
 from ..utils.misc import fopen, pbar
@@ -14,10 +15,47 @@ def make_dataloader(dataset, pin_memory=False, num_workers=0):
         logger.info('Forcing num_workers to 0 since it fails with torch 0.4')
         num_workers = 0
 
+    collate_fn = dataset.collate_fn
+    if pin_memory:
+        # DataLoader's own pinning converts our Batch objects back to plain
+        # dicts, pin them ourselves. This is fine since num_workers == 0,
+        # i.e. collation happens in the main process.
+        def collate_fn(batch):
+            return dataset.collate_fn(batch).pin_memory()
+
     return DataLoader(
         dataset, batch_sampler=dataset.sampler,
-        collate_fn=dataset.collate_fn,
-        pin_memory=pin_memory, num_workers=num_workers)
+        collate_fn=collate_fn, num_workers=num_workers)
+
+
+def prefetch_batches(loader, device):
+    """Yields the batches of ``loader`` after moving them to ``device``.
+    On CUDA devices, the copy of the next batch is issued on a side stream
+    so that it overlaps with the computation done on the current batch.
+    Batches should be in pinned memory for the copies to be asynchronous."""
+    if device is None or device.type != 'cuda':
+        for batch in loader:
+            batch.device(device)
+            yield batch
+        return
+
+    stream = torch.cuda.Stream(device)
+    prev = None
+    for batch in loader:
+        with torch.cuda.stream(stream):
+            batch.device(device, non_blocking=True)
+        if prev is not None:
+            yield prev
+        # Compute stream should wait for the copy before using the batch
+        current = torch.cuda.current_stream(device)
+        current.wait_stream(stream)
+        for tensor in batch.values():
+            # Do not reuse the memory before the compute stream is done
+            tensor.record_stream(current)
+        prev = batch
+
+    if prev is not None:
+        yield prev
 
 
 def sort_batch(seqbatch):
@@ -35,30 +73,20 @@ def pad_video_sequence(seqs):
     Pads video sequences with zero vectors for minibatch processing.
     (contributor: @elliottd)
 
-    TODO: Can we write the for loop in a more compact format?
+    Returns a batch_size x max_len x feat_size float tensor.
     """
-    lengths = [len(s) for s in seqs]
-    # Get the desired size of the padding vector from the input seqs data
-    feat_size = seqs[0].shape[1]
-    max_len = max(lengths)
-    tmp = []
-    for s, len_ in zip(seqs, lengths):
-        if max_len - len_ == 0:
-            tmp.append(s)
-        else:
-            inner_tmp = s
-            for i in range(max_len - len_):
-                inner_tmp = np.vstack((inner_tmp, (np.array([0.] * feat_size))))
-            tmp.append(inner_tmp)
-    padded = np.array(tmp, dtype='float32')
-    return torch.FloatTensor(torch.from_numpy(padded))
+    return pad_sequence(
+        [torch.from_numpy(np.asarray(s, dtype='float32')) for s in seqs],
+        batch_first=True)
 
 
 def onehot_data(idxs, n_classes):
     """Returns a binary batch_size x n_classes one-hot tensor."""
     out = torch.zeros(len(idxs), n_classes)
-    for row, indices in zip(out, idxs):
-        row.scatter_(0, indices, 1)
+    # Set all (row, index) pairs at once
+    rows = torch.arange(len(idxs)).repeat_interleave(
+        torch.tensor([len(indices) for indices in idxs]))
+    out[rows, torch.cat(idxs)] = 1
     return out
 
 
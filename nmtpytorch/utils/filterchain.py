@@ -4,6 +4,12 @@ from pathlib import Path
 
 from .misc import get_temp_file, fopen
 
+# Whitespace except newlines so that patterns never cross line boundaries
+_STRIP = re.compile(r'^[^\S\n]+|[^\S\n]+$', re.MULTILINE)
+_TAG = re.compile('<[a-zA-Z][a-zA-Z]>')
+_SEGMENT = re.compile(' *<.*?:(.*?)>')
+_HYPHEN = re.compile(r'[^\S\n]*@-@[^\S\n]*')
+
 
 class FilterChain:
     """A sequential filter chain to post-process list of tokens.
@@ -23,21 +29,24 @@ class FilterChain:
             'upper': Uppercase.
             'de-hyphen': De-hyphenate 'foo @-@ bar' constructs of Moses.
     """
+    # NOTE: Filters are applied on newline-joined blocks of sentences,
+    # they should never match across line boundaries.
     FILTERS = {
         'de-bpe': lambda s: s.replace("@@ ", "").replace("@@", ""),
-        'de-tag': lambda s: re.sub('<[a-zA-Z][a-zA-Z]>', '', s),
+        'de-tag': lambda s: _TAG.sub('', s),
         # Decoder for Google sentenpiece
         # only for default params of spm_encode
-        'de-spm': lambda s: s.replace(" ", "").replace("\u2581", " ").strip(),
+        'de-spm': lambda s: _STRIP.sub(
+            '', s.replace(" ", "").replace("\u2581", " ")),
         # Converts segmentations of <tag:morpheme> to normal form
-        'de-segment': lambda s: re.sub(' *<.*?:(.*?)>', '\\1', s),
+        'de-segment': lambda s: _SEGMENT.sub('\\1', s),
         # Space delim character sequence to non-tokenized normal word form
-        'c2w': lambda s: s.replace(' ', '').replace('<s>', ' ').strip(),
+        'c2w': lambda s: _STRIP.sub('', s.replace(' ', '').replace('<s>', ' ')),
         # Filters out fillers from compound splitted sentences
         'de-compound': lambda s: (s.replace(" @@ ", "").replace(" @@", "")
                                   .replace(" @", "").replace("@ ", "")),
         # de-hyphenate when -a given to Moses tokenizer
-        'de-hyphen': lambda s: re.sub('\s*@-@\s*', '-', s),
+        'de-hyphen': lambda s: _HYPHEN.sub('-', s),
         'lower': lambda s: s.lower(),
         'upper': lambda s: s.upper(),
     }
@@ -49,9 +58,13 @@ class FilterChain:
         self.funcs = [self.FILTERS[k] for k in self.filters]
 
     def _apply(self, list_of_strs):
+        if not list_of_strs:
+            return []
+        # Apply each filter once on the whole block instead of per sentence
+        block = '\n'.join(list_of_strs)
         for func in self.funcs:
-            list_of_strs = [func(s) for s in list_of_strs]
-        return list_of_strs
+            block = func(block)
+        return block.split('\n')
 
     def __call__(self, inp):
         """Applies the filterchain on a given input.